@@ -1,14 +1,23 @@
-from machine import Pin, PWM
-import time
+from machine import Pin, PWM, Timer
 
 led = PWM(Pin(32, Pin.OUT))
 led.freq(2000)
 
-while True:
-    for duty in range(0, 1024, 10):
-        led.duty(duty)
-        time.sleep(0.01)
+duty = 0
+step = 10
 
-    for duty in range(1023, -1, -10):
-        led.duty(duty)
-        time.sleep(0.01)
+def fade(timer):
+    """Advance the fade by one step, reversing at either end"""
+    global duty, step
+    duty += step
+    if duty >= 1023:
+        duty = 1023
+        step = -step
+    elif duty <= 0:
+        duty = 0
+        step = -step
+    led.duty(duty)
+
+# Step the fade every 10 ms from a hardware timer; the CPU is free in between
+timer = Timer(0)
+timer.init(period=10, mode=Timer.PERIODIC, callback=fade)
@@ -1,13 +1,26 @@
 import network
+import time
 
 ssid = "your_SSID"
 password = "your_PASSWORD"
+timeout_ms = 15000  # Give up if not connected within this time
 
 wifi = network.WLAN(network.STA_IF)
 wifi.active(True)
 wifi.connect(ssid, password)
 
+# Sleep between checks instead of spinning the CPU
+start = time.ticks_ms()
 while not wifi.isconnected():
-    pass
+    status = wifi.status()
+    if status != network.STAT_CONNECTING and status != network.STAT_GOT_IP:
+        break  # Wrong password, AP not found, association failure, ...
+    if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+        break
+    time.sleep_ms(100)
 
-print("Connected:", wifi.ifconfig()[0])
+if wifi.isconnected():
+    print("Connected:", wifi.ifconfig()[0])
+else:
+    print("Connection failed, status:", wifi.status())
+    wifi.disconnect()  # Stop the driver retrying in the background
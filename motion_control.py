@@ -1,7 +1,9 @@
 import time
-import math
+import array
+import asyncio
+import micropython
 from machine import Pin, I2C
-from mpu6050 import MPU6050
+from mpu6050 import MPU6050, fast_atan2, pitch_denominator
 
 # Initialize I2C
 i2c = I2C(scl=Pin(22), sda=Pin(21))
@@ -9,10 +11,16 @@ i2c = I2C(scl=Pin(22), sda=Pin(21))
 # Initialize MPU6050
 mpu = MPU6050(i2c)
 
-# Filter parameters
-alpha = 0.8  # Low-pass filter factor
-beta = 0.95  # Complementary filter factor
-prev_angles = {"x": 0, "y": 0, "z": 0}
+# Filter time constants (seconds). Per-frame weights are derived from dt
+# as tau / (tau + dt), so the filters behave the same at any sample rate.
+# These match the old alpha = 0.6 and beta = 0.95 at a 100 ms frame.
+LPF_TAU = 0.15   # Low-pass filter
+COMP_TAU = 1.9   # Complementary filter
+SAMPLE_PERIOD_MS = 20     # Sensor read / angle update rate
+DISPLAY_PERIOD_MS = 100   # Direction classification / print rate
+
+# Latest angle estimate (x, y, z), written by _sample_task
+angles = array.array('f', [0.0, 0.0, 0.0])
 prev_time = time.ticks_ms()
 
 # Movement thresholds - adjust based on your calibration
@@ -23,116 +31,156 @@ FORWARD_THRESHOLD = 15    # Was CRAB_THRESHOLD (Positive Y angle)
 BACKWARD_THRESHOLD = -15  # Was negative CRAB_THRESHOLD (Negative Y angle)
 DEAD_ZONE = 10            # Neutral zone size
 
-def low_pass_filter(new_value, prev_value, alpha):
-    """Simple low-pass filter"""
-    return alpha * prev_value + (1 - alpha) * new_value
+# Effective bucket limits: a threshold inside the dead zone is widened to it
+_RIGHT = max(RIGHT_THRESHOLD, DEAD_ZONE)
+_LEFT = min(LEFT_THRESHOLD, -DEAD_ZONE)
+_FORWARD = max(FORWARD_THRESHOLD, DEAD_ZONE)
+_BACKWARD = min(BACKWARD_THRESHOLD, -DEAD_ZONE)
+_TURN = max(TURN_THRESHOLD, DEAD_ZONE)
+
+# Direction codes returned by get_direction
+STOP = 0
+FORWARD = 1
+BACKWARD = 2
+LEFT = 3
+RIGHT = 4
+ROTATE_LEFT = 5
+ROTATE_RIGHT = 6
+
+# (name, indicator) for each direction code
+_DIRS = (("STOP", ""), ("FORWARD", "↑"), ("BACKWARD", "↓"), ("LEFT", "←"),
+         ("RIGHT", "→"), ("ROTATE_LEFT", "↺"), ("ROTATE_RIGHT", "↻"))
+
+def _build_dir_lut():
+    """
+    Direction code for every (bx, by, bz) in {-1, 0, 1}^3, indexed by
+    (bx + 1) * 9 + (by + 1) * 3 + (bz + 1).
+    Rotation wins over left/right, which wins over forward/backward.
+    """
+    lut = []
+    for bx in (-1, 0, 1):
+        for by in (-1, 0, 1):
+            for bz in (-1, 0, 1):
+                if bz:
+                    code = ROTATE_RIGHT if bz > 0 else ROTATE_LEFT
+                elif bx:
+                    code = RIGHT if bx > 0 else LEFT
+                elif by:
+                    code = FORWARD if by > 0 else BACKWARD
+                else:
+                    code = STOP
+                lut.append(code)
+    return tuple(lut)
+
+_DIR_LUT = _build_dir_lut()
 
 def get_direction(angle_x, angle_y, angle_z):
-    """Determine the direction based on angles with modified mapping"""
-    direction = "STOP"
-    
-    # Forward/Backward detection (now using Y axis / roll)
-    if angle_y > DEAD_ZONE and angle_y > FORWARD_THRESHOLD:
-        direction = "FORWARD"  # Was CRAB_RIGHT
-    elif angle_y < -DEAD_ZONE and angle_y < BACKWARD_THRESHOLD:
-        direction = "BACKWARD"  # Was CRAB_LEFT
+    """Determine the direction code based on angles with modified mapping"""
+    # Bucket each axis to -1/0/+1 using the dead-zone-clamped limits
+    bx = (angle_x > _RIGHT) - (angle_x < _LEFT)
+    by = (angle_y > _FORWARD) - (angle_y < _BACKWARD)
+    bz = (angle_z > _TURN) - (angle_z < -_TURN)
+    return _DIR_LUT[bx * 9 + by * 3 + bz + 13]
+
+@micropython.native
+def _update(ax, ay, az, gx, gy, gz, px, py, pz, dt):
+    """
+    Per-frame angle update: complementary filter on X/Y, gyro
+    integration on Z. Returns (angle_x, angle_y, angle_z).
+    """
+    accel_angle_x = fast_atan2(ay, az)
+    accel_angle_y = fast_atan2(-ax, pitch_denominator(ay, az))
     
-    # Left/Right detection (now using X axis / pitch)
-    if angle_x < -DEAD_ZONE and angle_x < LEFT_THRESHOLD:
-        direction = "LEFT"  # Was FORWARD
-    elif angle_x > DEAD_ZONE and angle_x > RIGHT_THRESHOLD:
-        direction = "RIGHT"  # Was BACKWARD
+    beta = COMP_TAU / (COMP_TAU + dt)
+    one_minus_beta = 1.0 - beta
+    angle_x = beta * (px + gx * dt) + one_minus_beta * accel_angle_x
+    angle_y = beta * (py + gy * dt) + one_minus_beta * accel_angle_y
+    angle_z = pz + gz * dt
     
-    # Turn detection (yaw - keeping this as is)
-    if abs(angle_z) > DEAD_ZONE and abs(angle_z) > TURN_THRESHOLD:
-        if angle_z > 0:
-            direction = "ROTATE_RIGHT"
-        else:
-            direction = "ROTATE_LEFT"
-            
-    return direction
+    return angle_x, angle_y, angle_z
 
-def start_direction_display():
-    global prev_angles, prev_time
+async def _sample_task():
+    """Read the sensor as fast as needed and keep `angles` up to date"""
+    global prev_time
     
-    # Variables for smoothing display
-    prev_data = {}
-    prev_direction = "STOP"
-    direction_count = 0
+    prev_data = None
     
-    print("Calibrating sensor, please keep hand in neutral position...")
-    mpu.calibrate(samples=100)
-    print("Calibration complete! Start moving your hand to see directions.")
-    print("MODIFIED MAPPING: forward=Y+, backward=Y-, left=X-, right=X+")
+    # Bind frequently used callables to locals for faster lookup
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+    get_values = mpu.get_values
     
     while True:
-        # Get current time for delta calculation
-        current_time = time.ticks_ms()
-        dt = (current_time - prev_time) / 1000.0
+        # Get current time for delta calculation (wraparound-safe)
+        current_time = ticks_ms()
+        dt = ticks_diff(current_time, prev_time) / 1000.0
         prev_time = current_time
         
-        # Get raw sensor values
-        data = mpu.get_values(samples=5, delay=0.01)
+        # Get raw sensor values (single read, smoothing is done below)
+        data = get_values()
         
         # Apply low-pass filter if we have previous data
-        if prev_data:
-            for key in data:
-                if key in prev_data:
-                    data[key] = low_pass_filter(data[key], prev_data[key], alpha)
+        # data = [AcX_g, AcY_g, AcZ_g, GyX_deg, GyY_deg, GyZ_deg]
+        if prev_data is not None:
+            a = LPF_TAU / (LPF_TAU + dt)
+            oma = 1.0 - a
+            data[0] = a * prev_data[0] + oma * data[0]
+            data[1] = a * prev_data[1] + oma * data[1]
+            data[2] = a * prev_data[2] + oma * data[2]
+            data[3] = a * prev_data[3] + oma * data[3]
+            data[4] = a * prev_data[4] + oma * data[4]
+            data[5] = a * prev_data[5] + oma * data[5]
+        
+        # Update angles
+        angles[0], angles[1], angles[2] = _update(
+            data[0], data[1], data[2], data[3], data[4], data[5],
+            angles[0], angles[1], angles[2], dt)
+        
+        # Keep a reference to this frame; get_values double-buffers
+        prev_data = data
         
-        # Calculate angles from accelerometer data
-        if "AcX_g" in data:
-            # Calculate angles
-            accel_angle_x = math.atan2(data["AcY_g"], data["AcZ_g"]) * 180 / math.pi
-            accel_angle_y = math.atan2(-data["AcX_g"], 
-                                      math.sqrt(data["AcY_g"]**2 + data["AcZ_g"]**2)) * 180 / math.pi
-            
-            # Apply complementary filter
-            angle_x = beta * (prev_angles["x"] + data["GyX_deg"] * dt) + (1 - beta) * accel_angle_x
-            angle_y = beta * (prev_angles["y"] + data["GyY_deg"] * dt) + (1 - beta) * accel_angle_y
-            angle_z = prev_angles["z"] + data["GyZ_deg"] * dt
-            
-            # Update for next iteration
-            prev_angles = {"x": angle_x, "y": angle_y, "z": angle_z}
-            
-            # Get direction based on angles
-            direction = get_direction(angle_x, angle_y, angle_z)
-            
-            # Smooth direction changes (prevent flickering)
-            if direction == prev_direction:
-                direction_count += 1
-            else:
-                direction_count = 0
-                prev_direction = direction
-            
-            # Only display if direction is stable or significant change
-            if direction_count >= 2:
-                # Create direction output with visual indicators
-                direction_display = f"{direction}"
-                angle_display = f"X={angle_x:.1f}°, Y={angle_y:.1f}°, Z={angle_z:.1f}°"
-                
-                # Add visual indicator for direction
-                indicator = ""
-                if direction == "FORWARD":
-                    indicator = "↑"
-                elif direction == "BACKWARD":
-                    indicator = "↓"
-                elif direction == "LEFT":
-                    indicator = "←"
-                elif direction == "RIGHT":
-                    indicator = "→"
-                elif direction == "ROTATE_LEFT":
-                    indicator = "↺"
-                elif direction == "ROTATE_RIGHT":
-                    indicator = "↻"
-                
-                # Print the direction and angles
-                print(f"Direction: {direction_display} {indicator} | Angles: {angle_display}")
-            
-            # Update previous values
-            prev_data = data.copy()
+        await asyncio.sleep_ms(SAMPLE_PERIOD_MS)
+
+async def _classify_task():
+    """Classify the latest angles and print stable direction changes"""
+    # Variables for smoothing display
+    prev_direction = STOP
+    direction_count = 0
+    
+    while True:
+        angle_x = angles[0]
+        angle_y = angles[1]
+        angle_z = angles[2]
+        direction = get_direction(angle_x, angle_y, angle_z)
         
-        time.sleep(0.1)  # 100ms refresh rate
+        # Smooth direction changes (prevent flickering)
+        if direction == prev_direction:
+            direction_count += 1
+        else:
+            direction_count = 0
+            prev_direction = direction
+        
+        # Only display once, when the direction has just become stable
+        if direction_count == 2:
+            name, indicator = _DIRS[direction]
+            print("Direction: %s %s | Angles: X=%.1f°, Y=%.1f°, Z=%.1f°" %
+                  (name, indicator, angle_x, angle_y, angle_z))
+        
+        await asyncio.sleep_ms(DISPLAY_PERIOD_MS)
+
+async def _run_tasks():
+    await asyncio.gather(_sample_task(), _classify_task())
+
+def start_direction_display():
+    global prev_time
+    
+    print("Calibrating sensor, please keep hand in neutral position...")
+    mpu.calibrate(samples=100)
+    print("Calibration complete! Start moving your hand to see directions.")
+    print("MODIFIED MAPPING: forward=Y+, backward=Y-, left=X-, right=X+")
+    
+    prev_time = time.ticks_ms()
+    asyncio.run(_run_tasks())
 
 if __name__ == "__main__":
     try:
@@ -1,9 +1,61 @@
 import time
+import math
+import array
+import ustruct
+import micropython
 from machine import I2C
 
+# Precomputed constants (multiply instead of divide in the hot path)
+_RAD2DEG = 180.0 / math.pi
+_INV_ACC = 1.0 / 16384.0  # 1 / ACCEL_SCALE_MODIFIER_2G
+_INV_GYR = 1.0 / 131.0    # 1 / GYRO_SCALE_MODIFIER_250DEG
+
+# Register values written at init
+_WAKE = b'\x00'               # PWR_MGMT_1: clear sleep bit
+# SMPLRT_DIV 0 (1 kHz with DLPF on), CONFIG DLPF_CFG=3 (~43 Hz bandwidth),
+# GYRO_CONFIG 250deg/s, ACCEL_CONFIG +/-2g
+_SENSOR_CFG = b'\x00\x03\x00\x00'
+
+@micropython.native
+def fast_atan2(y, x):
+    """
+    Approximate atan2(y, x) in degrees (max error ~0.3 degrees).
+    Uses Rajan's atan(z) ~= z / (1 + 0.28086 * z^2) on the first octant
+    and maps the result back to the full circle.
+    """
+    ax = abs(x)
+    ay = abs(y)
+    if ax >= ay:
+        if ax == 0:
+            return 0.0
+        z = ay / ax
+        angle = _RAD2DEG * z / (1.0 + 0.28086 * z * z)
+    else:
+        z = ax / ay
+        angle = 90.0 - _RAD2DEG * z / (1.0 + 0.28086 * z * z)
+    if x < 0:
+        angle = 180.0 - angle
+    if y < 0:
+        angle = -angle
+    return angle
+
+@micropython.native
+def pitch_denominator(ay, az):
+    """
+    Denominator for the pitch angle atan2(-ax, sqrt(ay^2 + az^2)).
+    Within ~15 deg of roll (|ay| < 0.27 * |az|) |az| is within 4% of the
+    exact value, moving pitch by about 1 deg at most, so the sqrt is
+    skipped. Larger rolls (LEFT/RIGHT gestures) use the exact form.
+    """
+    if abs(ay) < 0.27 * abs(az):
+        return abs(az)
+    return math.sqrt(ay * ay + az * az)
+
 class MPU6050:
     # MPU6050 Registers
     PWR_MGMT_1 = 0x6B
+    SMPLRT_DIV = 0x19
+    CONFIG = 0x1A
     GYRO_CONFIG = 0x1B
     ACCEL_CONFIG = 0x1C
     ACCEL_XOUT_H = 0x3B
@@ -19,139 +71,145 @@ class MPU6050:
         self.addr = addr
         
         # Wake up MPU6050
-        self.i2c.writeto_mem(self.addr, self.PWR_MGMT_1, b'\x00')
+        self.i2c.writeto_mem(self.addr, self.PWR_MGMT_1, _WAKE)
         time.sleep(0.1)  # Wait for device to stabilize
         
-        # Configure accelerometer (+/-2g)
-        self.i2c.writeto_mem(self.addr, self.ACCEL_CONFIG, b'\x00')
-        
-        # Configure gyroscope (250deg/s)
-        self.i2c.writeto_mem(self.addr, self.GYRO_CONFIG, b'\x00')
+        # Configure sample rate, on-chip low-pass filter, gyroscope (250deg/s)
+        # and accelerometer (+/-2g) in one write: registers 0x19-0x1C are
+        # contiguous. The DLPF does the noise filtering in hardware.
+        self.i2c.writeto_mem(self.addr, self.SMPLRT_DIV, _SENSOR_CFG)
         
         # Initialize calibration offsets
         self.accel_offsets = {"x": 0, "y": 0, "z": 0}
         self.gyro_offsets = {"x": 0, "y": 0, "z": 0}
+        # Same offsets as accel x, y, z, gyro x, y, z for the hot path
+        self._offsets = array.array('f', [0.0] * 6)
+        
+        # Reusable I2C read buffer (avoids an allocation per read)
+        self._buf = bytearray(14)
         
-    def read_raw_data(self, reg):
-        data = self.i2c.readfrom_mem(self.addr, reg, 2)
-        value = (data[0] << 8) | data[1]
-        if value > 32767:
-            value -= 65536  # Convert to signed
-        return value
+        # Double-buffered output: AcX_g, AcY_g, AcZ_g, GyX_deg, GyY_deg, GyZ_deg
+        # get_values alternates between them so the previous result stays valid
+        self._buf_a = array.array('f', [0.0] * 6)
+        self._buf_b = array.array('f', [0.0] * 6)
+        self._active = 0
+        
+    def _read_all(self):
+        """Burst read AcX, AcY, AcZ, Tmp, GyX, GyY, GyZ in one transaction"""
+        # Register pointer auto-increments, so 14 bytes from ACCEL_XOUT_H
+        # cover accel, temperature and gyro as signed big-endian words
+        self.i2c.readfrom_mem_into(self.addr, self.ACCEL_XOUT_H, self._buf)
+        return ustruct.unpack_from('>7h', self._buf)
         
     def calibrate(self, samples=100, delay=0.01):
         """Calibrate by calculating offsets from multiple samples"""
         print("Calibrating MPU6050, keep the sensor still...")
         
-        accel_sum = {"x": 0, "y": 0, "z": 0}
-        gyro_sum = {"x": 0, "y": 0, "z": 0}
-        
-        for _ in range(samples):
-            # Read raw values
-            accel_x = self.read_raw_data(self.ACCEL_XOUT_H)
-            accel_y = self.read_raw_data(self.ACCEL_XOUT_H + 2)
-            accel_z = self.read_raw_data(self.ACCEL_XOUT_H + 4)
-            
-            gyro_x = self.read_raw_data(self.GYRO_XOUT_H)
-            gyro_y = self.read_raw_data(self.GYRO_XOUT_H + 2)
-            gyro_z = self.read_raw_data(self.GYRO_XOUT_H + 4)
-            
-            # Sum all readings
-            accel_sum["x"] += accel_x
-            accel_sum["y"] += accel_y
-            accel_sum["z"] += accel_z - self.ACCEL_SCALE_MODIFIER_2G  # Remove gravity from Z
-            
-            gyro_sum["x"] += gyro_x
-            gyro_sum["y"] += gyro_y
-            gyro_sum["z"] += gyro_z
-            
+        # Phase 1: collect all raw bursts into one buffer
+        raw = bytearray(14 * samples)
+        mv = memoryview(raw)
+        for i in range(samples):
+            self.i2c.readfrom_mem_into(self.addr, self.ACCEL_XOUT_H, mv[14 * i:14 * i + 14])
             time.sleep(delay)
             
+        # Phase 2: sum all readings in a single pass
+        sax = say = saz = 0
+        sgx = sgy = sgz = 0
+        for i in range(samples):
+            ax, ay, az, _, gx, gy, gz = ustruct.unpack_from('>7h', raw, 14 * i)
+            sax += ax
+            say += ay
+            saz += az
+            sgx += gx
+            sgy += gy
+            sgz += gz
+            
         # Calculate average offsets
-        self.accel_offsets["x"] = accel_sum["x"] / samples
-        self.accel_offsets["y"] = accel_sum["y"] / samples
-        self.accel_offsets["z"] = accel_sum["z"] / samples
+        self.accel_offsets["x"] = sax / samples
+        self.accel_offsets["y"] = say / samples
+        self.accel_offsets["z"] = saz / samples - self.ACCEL_SCALE_MODIFIER_2G  # Remove gravity from Z
         
-        self.gyro_offsets["x"] = gyro_sum["x"] / samples
-        self.gyro_offsets["y"] = gyro_sum["y"] / samples
-        self.gyro_offsets["z"] = gyro_sum["z"] / samples
+        self.gyro_offsets["x"] = sgx / samples
+        self.gyro_offsets["y"] = sgy / samples
+        self.gyro_offsets["z"] = sgz / samples
+        
+        off = self._offsets
+        off[0] = self.accel_offsets["x"]
+        off[1] = self.accel_offsets["y"]
+        off[2] = self.accel_offsets["z"]
+        off[3] = self.gyro_offsets["x"]
+        off[4] = self.gyro_offsets["y"]
+        off[5] = self.gyro_offsets["z"]
         
         print("Calibration complete")
         
-    def get_values(self, samples=5, delay=0.01):
-        """Get filtered and calibrated sensor values"""
-        values = {
-            "GyX": 0, "GyY": 0, "GyZ": 0, 
-            "Tmp": 0, 
-            "AcX": 0, "AcY": 0, "AcZ": 0
-        }
+    def get_values(self, samples=1, delay=0):
+        """
+        Get filtered and calibrated sensor values as
+        array('f', [AcX_g, AcY_g, AcZ_g, GyX_deg, GyY_deg, GyZ_deg])
+        The returned array is reused on the call after next.
+        """
+        off = self._offsets
+        ax_off = off[0]
+        ay_off = off[1]
+        az_off = off[2]
+        gx_off = off[3]
+        gy_off = off[4]
+        gz_off = off[5]
+        
+        ax = ay = az = 0.0
+        gx = gy = gz = 0.0
         
         for _ in range(samples):
             # Read raw values
-            accel_x = self.read_raw_data(self.ACCEL_XOUT_H) - self.accel_offsets["x"]
-            accel_y = self.read_raw_data(self.ACCEL_XOUT_H + 2) - self.accel_offsets["y"]
-            accel_z = self.read_raw_data(self.ACCEL_XOUT_H + 4) - self.accel_offsets["z"]
-            
-            gyro_x = self.read_raw_data(self.GYRO_XOUT_H) - self.gyro_offsets["x"]
-            gyro_y = self.read_raw_data(self.GYRO_XOUT_H + 2) - self.gyro_offsets["y"]
-            gyro_z = self.read_raw_data(self.GYRO_XOUT_H + 4) - self.gyro_offsets["z"]
-            
-            temp = self.read_raw_data(self.TEMP_OUT_H) / 340.0 + 36.53
-            
-            # Apply scaling to convert to meaningful units
-            accel_x_g = accel_x / self.ACCEL_SCALE_MODIFIER_2G
-            accel_y_g = accel_y / self.ACCEL_SCALE_MODIFIER_2G
-            accel_z_g = accel_z / self.ACCEL_SCALE_MODIFIER_2G
+            raw_ax, raw_ay, raw_az, _, raw_gx, raw_gy, raw_gz = self._read_all()
             
-            gyro_x_deg = gyro_x / self.GYRO_SCALE_MODIFIER_250DEG
-            gyro_y_deg = gyro_y / self.GYRO_SCALE_MODIFIER_250DEG
-            gyro_z_deg = gyro_z / self.GYRO_SCALE_MODIFIER_250DEG
+            # Accumulate calibrated readings
+            ax += raw_ax - ax_off
+            ay += raw_ay - ay_off
+            az += raw_az - az_off
+            gx += raw_gx - gx_off
+            gy += raw_gy - gy_off
+            gz += raw_gz - gz_off
             
-            # Add to accumulators (raw values for backward compatibility)
-            values["GyX"] += gyro_x
-            values["GyY"] += gyro_y
-            values["GyZ"] += gyro_z
-            values["Tmp"] += temp
-            values["AcX"] += accel_x
-            values["AcY"] += accel_y
-            values["AcZ"] += accel_z
+            if delay:
+                time.sleep(delay)
             
-            # Add scaled values
-            if "GyX_deg" not in values:
-                values["GyX_deg"] = 0
-                values["GyY_deg"] = 0
-                values["GyZ_deg"] = 0
-                values["AcX_g"] = 0
-                values["AcY_g"] = 0
-                values["AcZ_g"] = 0
-            
-            values["GyX_deg"] += gyro_x_deg
-            values["GyY_deg"] += gyro_y_deg
-            values["GyZ_deg"] += gyro_z_deg
-            values["AcX_g"] += accel_x_g
-            values["AcY_g"] += accel_y_g
-            values["AcZ_g"] += accel_z_g
-            
-            time.sleep(delay)
-            
-        # Average values
-        for key in values:
-            values[key] /= samples
-            
-        return values
+        # Average and scale to g and deg/s
+        inv_samples = 1.0 / samples
+        accel_k = _INV_ACC * inv_samples
+        gyro_k = _INV_GYR * inv_samples
+        
+        # Write into the inactive buffer and flip
+        if self._active:
+            out = self._buf_a
+        else:
+            out = self._buf_b
+        self._active ^= 1
+        out[0] = ax * accel_k
+        out[1] = ay * accel_k
+        out[2] = az * accel_k
+        out[3] = gx * gyro_k
+        out[4] = gy * gyro_k
+        out[5] = gz * gyro_k
+        
+        return out
         
-    def apply_complementary_filter(self, accel_data, gyro_data, dt, alpha=0.98):
+    def apply_complementary_filter(self, accel_data, gyro_data, dt, prev_x, prev_y, alpha=0.98):
         """
         Apply complementary filter to combine accelerometer and gyroscope data
-        for more accurate orientation estimation
+        for more accurate orientation estimation.
+        prev_x/prev_y are the previous angle_x/angle_y estimates.
         """
         # Calculate angles from accelerometer data
-        accel_angle_x = math.atan2(accel_data["AcY_g"], accel_data["AcZ_g"]) * 180 / math.pi
-        accel_angle_y = math.atan2(-accel_data["AcX_g"], 
-                                  math.sqrt(accel_data["AcY_g"]**2 + accel_data["AcZ_g"]**2)) * 180 / math.pi
+        ay = accel_data[1]
+        az = accel_data[2]
+        accel_angle_x = fast_atan2(ay, az)
+        accel_angle_y = fast_atan2(-accel_data[0], pitch_denominator(ay, az))
         
         # Combine with gyroscope data
-        angle_x = alpha * (angle_x + gyro_data["GyX_deg"] * dt) + (1 - alpha) * accel_angle_x
-        angle_y = alpha * (angle_y + gyro_data["GyY_deg"] * dt) + (1 - alpha) * accel_angle_y
+        one_minus_alpha = 1 - alpha
+        angle_x = alpha * (prev_x + gyro_data[3] * dt) + one_minus_alpha * accel_angle_x
+        angle_y = alpha * (prev_y + gyro_data[4] * dt) + one_minus_alpha * accel_angle_y
         
         return {"angle_x": angle_x, "angle_y": angle_y}